@@ -1,11 +1,126 @@
+import argparse
 import cv2
+import os
 import time
+import queue
+import threading
 from pose_detector import PoseDetector
-from squat_analyzer import SquatAnalyzer
-from utils import draw_text_with_background, get_landmark_pixel
-import mediapipe as mp
+from squat_analyzer import SquatAnalyzer, L_KNEE, R_KNEE
+from dashboard import DashboardRenderer
+from utils import get_landmark_pixel
+
+def put_latest(q, item):
+    """
+    Puts an item on a bounded queue, dropping the oldest entry when full
+    so the consumer always gets the most recent data.
+    """
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+def capture_loop(cap, q_raw, stop_event):
+    """
+    Capture stage: reads camera frames into q_raw. Frames inference can't
+    keep up with are dropped by put_latest, so no explicit skipping is needed.
+    """
+    while not stop_event.is_set():
+        success, frame = cap.read()
+        if not success:
+            print("Failed to read frame.")
+            stop_event.set()
+            break
+
+        put_latest(q_raw, frame)
+
+def inference_loop(detector, analyzer, q_raw, q_out, stop_event):
+    """
+    Inference stage: pose detection + squat analysis on the latest frame.
+    """
+    p_time = time.time()
+    ema_dt = None # Smoothed frame interval
+    fps = 0
+    frame_idx = 0
+
+    while not stop_event.is_set():
+        try:
+            frame = q_raw.get(timeout=0.1)
+        except queue.Empty:
+            continue
+
+        # 3. Pose Detection
+        frame, results = detector.find_pose(frame, draw=True)
+        landmarks = detector.get_landmarks()
+
+        # 4. Analysis
+        analysis_data = {}
+        if landmarks:
+            h, w, c = frame.shape
+            # Copy: the analyzer reuses its result dict while display reads this one
+            analysis_data = dict(analyzer.analyze(landmarks, w, h))
+
+        # FPS Calculation (EMA of frame intervals)
+        c_time = time.time()
+        dt = c_time - p_time
+        ema_dt = dt if ema_dt is None else 0.9 * ema_dt + 0.1 * dt
+        p_time = c_time
+        # Refresh the displayed value every 10 frames so it doesn't flicker
+        if frame_idx % 10 == 0 and ema_dt > 0:
+            fps = 1 / ema_dt
+        frame_idx += 1
+
+        put_latest(q_out, (frame, landmarks, analysis_data, fps))
+
+def render(dashboard, frame, landmarks, analysis_data, fps):
+    """
+    Display stage: draws joint angles and the dashboard onto the frame.
+    """
+    if landmarks:
+        h, w, c = frame.shape
+        # Draw Angles on joints ONLY if we have valid data (check if feedback is not error)
+        if analysis_data.get('l_knee_angle', 0) > 0:
+            # Left Knee
+            l_knee = landmarks[L_KNEE]
+            lk_pos = get_landmark_pixel(l_knee, w, h)
+            cv2.putText(frame, f"{int(analysis_data['l_knee_angle'])}", lk_pos,
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+
+            # Right Knee
+            r_knee = landmarks[R_KNEE]
+            rk_pos = get_landmark_pixel(r_knee, w, h)
+            cv2.putText(frame, f"{int(analysis_data['r_knee_angle'])}", rk_pos,
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+
+    # 5. UI / Overlay
+    dashboard.render(frame, analysis_data, fps)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Real-time squat analysis from a webcam.")
+    parser.add_argument("--complexity", type=int, choices=(0, 1, 2), default=0,
+                        help="MediaPipe pose model complexity: 0 (Lite, fastest), 1 (Full), 2 (Heavy). "
+                             "Lite and Heavy are downloaded on first use; Lite falls back to Full "
+                             "if the download fails")
+    parser.add_argument("--inference-scale", type=float, default=0.5,
+                        help="Resize factor applied to frames before pose inference (1.0 = full resolution)")
+    parser.add_argument("--model", default=None,
+                        help="Path to a MediaPipe PoseLandmarker .task model (e.g. pose_landmarker_lite.task) "
+                             "to use the Tasks API with the GPU delegate instead of the legacy solution")
+    parser.add_argument("--cpu", action="store_true",
+                        help="With --model, skip the GPU delegate and run on CPU")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+
+    # Make sure OpenCV's SIMD code paths and thread pool are enabled
+    cv2.setUseOptimized(True)
+    cv2.setNumThreads(os.cpu_count() or 1)
+
     # 1. Setup Video Capture
     # Try index 0 first, then 1 if failed. Or provide a video path.
     cap = cv2.VideoCapture(0)
@@ -16,103 +131,48 @@ def main():
     # Set resolution (optional, for performance)
     cap.set(3, 1280)
     cap.set(4, 720)
+    # Keep at most one frame queued in the driver to minimize latency
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
 
     # 2. Initialize Modules
-    detector = PoseDetector()
+    detector = PoseDetector(complexity=args.complexity, inference_scale=args.inference_scale,
+                            model_path=args.model, use_gpu=not args.cpu)
     analyzer = SquatAnalyzer()
-    
-    p_time = 0
+    dashboard = DashboardRenderer()
+
+    # Pipeline: capture -> inference -> display, linked by single-slot
+    # drop-oldest queues so latency doesn't build up behind the slowest stage
+    q_raw = queue.Queue(maxsize=1)
+    q_out = queue.Queue(maxsize=1)
+    stop_event = threading.Event()
+
+    workers = [
+        threading.Thread(target=capture_loop, args=(cap, q_raw, stop_event), daemon=True),
+        threading.Thread(target=inference_loop, args=(detector, analyzer, q_raw, q_out, stop_event), daemon=True)
+    ]
 
     print("Starting Squat Analysis System...")
     print("Press 'q' to quit.")
 
-    while True:
-        success, frame = cap.read()
-        if not success:
-            print("Failed to read frame.")
-            break
+    for worker in workers:
+        worker.start()
 
-        # 3. Pose Detection
-        frame, results = detector.find_pose(frame, draw=True)
-        landmarks = detector.get_landmarks()
-        
-        # 4. Analysis
-        analysis_data = {}
-        if landmarks:
-            h, w, c = frame.shape
-            analysis_data = analyzer.analyze(landmarks, w, h)
-            
-            # Draw Angles on joints ONLY if we have valid data (check if feedback is not error)
-            if analysis_data.get('l_knee_angle', 0) > 0:
-                # Left Knee
-                l_knee = landmarks[mp.solutions.pose.PoseLandmark.LEFT_KNEE.value]
-                lk_pos = get_landmark_pixel(l_knee, w, h)
-                cv2.putText(frame, f"{int(analysis_data['l_knee_angle'])}", lk_pos, 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
-                
-                # Right Knee
-                r_knee = landmarks[mp.solutions.pose.PoseLandmark.RIGHT_KNEE.value]
-                rk_pos = get_landmark_pixel(r_knee, w, h)
-                cv2.putText(frame, f"{int(analysis_data['r_knee_angle'])}", rk_pos, 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
-        else:
-             # Handle no landmarks case explicitly if needed, though analyzer handles it now too
-             pass
-
-        # 5. UI / Overlay
-        # FPS Calculation
-        c_time = time.time()
-        fps = 1 / (c_time - p_time)
-        p_time = c_time
-        
-        # Dashboard Background
-        cv2.rectangle(frame, (0, 0), (400, 350), (0, 0, 0), cv2.FILLED)
-        cv2.addWeighted(frame[0:350, 0:400], 0.7, frame[0:350, 0:400], 0.3, 0, frame[0:350, 0:400]) # Semi-transparent
-        
-        # Display Data
-        draw_text_with_background(frame, f"FPS: {int(fps)}", (10, 30), text_color=(0, 255, 0))
-        
-        if analysis_data:
-            # State
-            state_color = (0, 255, 255) # Yellow
-            if analysis_data['state'] == "BOTTOM": state_color = (0, 255, 0) # Green
-            draw_text_with_background(frame, f"State: {analysis_data['state']}", (10, 70), text_color=state_color)
-            
-            # Rep Count
-            draw_text_with_background(frame, f"Reps: {analysis_data['rep_count']}", (10, 110), font_scale=1, thickness=2)
-            
-            # Correct/Incorrect Breakdown
-            c_reps = analysis_data.get('correct_reps', 0)
-            i_reps = analysis_data.get('incorrect_reps', 0)
-            cv2.putText(frame, f"Correct: {c_reps}", (10, 140), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-            cv2.putText(frame, f"Incorrect: {i_reps}", (150, 140), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-            
-            # Feedback
-            feedback = analysis_data.get('feedback', '')
-            draw_text_with_background(frame, feedback, (10, 180), text_color=(0, 100, 255))
-            
-            # Advice (New)
-            advice = analysis_data.get('advice', '')
-            if advice:
-                draw_text_with_background(frame, f"Advice: {advice}", (10, 220), text_color=(255, 255, 0), bg_color=(0,0,0))
-
-            # Valgus Warning
-            if analysis_data.get('valgus_detected', False):
-                draw_text_with_background(frame, "KNEE VALGUS!", (10, 280), text_color=(0, 0, 255), bg_color=(255, 255, 255))
-            
-            # View Info
-            view_mode = analysis_data.get('view', 'Unknown')
-            draw_text_with_background(frame, f"View: {view_mode}", (10, 320), text_color=(200, 200, 200))
-
-            # Last Rep Score
-            score = analysis_data.get('last_rep_score', 0)
-            draw_text_with_background(frame, f"Last Score: {score}", (10, 250), 
-                                      text_color=(0, 255, 0) if score > 80 else (0, 0, 255))
-
-        cv2.imshow("Squat Analysis System", frame)
+    # Display stays on the main thread (OpenCV windowing requires it on macOS)
+    while not stop_event.is_set():
+        try:
+            frame, landmarks, analysis_data, fps = q_out.get(timeout=0.01)
+        except queue.Empty:
+            frame = None
+
+        if frame is not None:
+            render(dashboard, frame, landmarks, analysis_data, fps)
+            cv2.imshow("Squat Analysis System", frame)
 
         if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+            stop_event.set()
+
+    for worker in workers:
+        worker.join()
 
     cap.release()
     cv2.destroyAllWindows()
@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+from utils import draw_text_with_background
+
+class DashboardRenderer:
+    def __init__(self, width=400, height=350):
+        """
+        Draws the analysis dashboard in the top-left corner of a frame.
+        """
+        self.width = width
+        self.height = height
+        # Black overlay blended behind the dashboard
+        self._overlay = np.zeros((height, width, 3), dtype=np.uint8)
+
+    def render(self, img, analysis_data, fps=None):
+        """
+        Draws the dashboard background, FPS (unless None) and analysis data onto img in place.
+        """
+        # Dashboard Background (Semi-transparent, blended in place)
+        roi = img[0:self.height, 0:self.width]
+        h, w = roi.shape[:2]
+        cv2.addWeighted(roi, 0.3, self._overlay[:h, :w], 0.7, 0, dst=roi)
+
+        # Display Data
+        if fps is not None:
+            draw_text_with_background(img, f"FPS: {int(fps)}", (10, 30), text_color=(0, 255, 0))
+
+        if not analysis_data:
+            return
+
+        # State
+        state_color = (0, 255, 255) # Yellow
+        if analysis_data['state'] == "BOTTOM": state_color = (0, 255, 0) # Green
+        draw_text_with_background(img, f"State: {analysis_data['state']}", (10, 70), text_color=state_color)
+
+        # Rep Count
+        draw_text_with_background(img, f"Reps: {analysis_data['rep_count']}", (10, 110), font_scale=1, thickness=2)
+
+        # Correct/Incorrect Breakdown
+        c_reps = analysis_data.get('correct_reps', 0)
+        i_reps = analysis_data.get('incorrect_reps', 0)
+        cv2.putText(img, f"Correct: {c_reps}", (10, 140), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        cv2.putText(img, f"Incorrect: {i_reps}", (150, 140), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+
+        # Feedback
+        feedback = analysis_data.get('feedback', '')
+        draw_text_with_background(img, feedback, (10, 180), text_color=(0, 100, 255))
+
+        # Advice
+        advice = analysis_data.get('advice', '')
+        if advice:
+            draw_text_with_background(img, f"Advice: {advice}", (10, 220), text_color=(255, 255, 0))
+
+        # Valgus Warning
+        if analysis_data.get('valgus_detected', False):
+            draw_text_with_background(img, "KNEE VALGUS!", (10, 280), text_color=(0, 0, 255),
+                                      bg_color=(255, 255, 255))
+
+        # View Info
+        view_mode = analysis_data.get('view', 'Unknown')
+        draw_text_with_background(img, f"View: {view_mode}", (10, 320), text_color=(200, 200, 200))
+
+        # Last Rep Score
+        score = analysis_data.get('last_rep_score', 0)
+        draw_text_with_background(img, f"Last Score: {score}", (10, 250),
+                                  text_color=(0, 255, 0) if score > 80 else (0, 0, 255))
@@ -1,25 +1,87 @@
+import time
 import cv2
+import numpy as np
 import mediapipe as mp
+from mediapipe.framework.formats import landmark_pb2
 
 class PoseDetector:
-    def __init__(self, mode=False, complexity=1, smooth_landmarks=True, 
+    def __init__(self, mode=False, complexity=0, smooth_landmarks=True, 
                  enable_segmentation=False, smooth_segmentation=True, 
-                 detection_con=0.5, track_con=0.5):
+                 detection_con=0.5, track_con=0.5, inference_scale=1.0,
+                 model_path=None, use_gpu=True):
         """
         Initializes the MediaPipe Pose object.
+        
+        Args:
+            complexity (int): Pose landmark model: 0 (Lite), 1 (Full) or 2 (Heavy).
+                Defaults to Lite, which roughly halves per-frame inference time
+                on CPU at the cost of some keypoint precision. Use 1 or 2 when
+                accuracy matters more than latency. Only the Full model ships
+                with the mediapipe wheel: Lite and Heavy are downloaded into
+                the mediapipe package on first use. If that fails (offline,
+                read-only install), Lite falls back to Full with a message.
+            inference_scale (float): Factor the frame is resized by before pose
+                inference (e.g. 0.5 runs 1280x720 input at 640x360). Landmarks
+                are normalized, so they stay valid at the original resolution.
+            model_path (str): Optional PoseLandmarker .task model (e.g.
+                pose_landmarker_lite.task). When given, the MediaPipe Tasks API
+                is used instead of the legacy solution, and `complexity` /
+                smoothing options are ignored (the model file decides).
+            use_gpu (bool): With model_path, try the GPU delegate first and
+                fall back to CPU if it is unavailable.
         """
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=mode,
-            model_complexity=complexity,
-            smooth_landmarks=smooth_landmarks,
-            enable_segmentation=enable_segmentation,
-            smooth_segmentation=smooth_segmentation,
-            min_detection_confidence=detection_con,
-            min_tracking_confidence=track_con
-        )
+        self.pose = None
+        self.landmarker = None
+        if model_path:
+            self.landmarker = self._create_landmarker(model_path, use_gpu, detection_con, track_con)
+        else:
+            pose_kwargs = dict(
+                static_image_mode=mode,
+                smooth_landmarks=smooth_landmarks,
+                enable_segmentation=enable_segmentation,
+                smooth_segmentation=smooth_segmentation,
+                min_detection_confidence=detection_con,
+                min_tracking_confidence=track_con
+            )
+            try:
+                self.pose = self.mp_pose.Pose(model_complexity=complexity, **pose_kwargs)
+            except OSError as e:
+                # URLError/PermissionError while downloading the Lite model
+                if complexity != 0:
+                    raise
+                print(f"Lite pose model unavailable ({e}), falling back to complexity=1.")
+                self.pose = self.mp_pose.Pose(model_complexity=1, **pose_kwargs)
         self.mp_drawing = mp.solutions.drawing_utils
         self.results = None
+        self.pose_landmarks = None # NormalizedLandmarkList of the last frame, if any
+        self._last_timestamp_ms = -1
+        self.inference_scale = inference_scale
+        # Persistent RGB input buffer (reallocated only when the input size changes)
+        self._rgb_buf = None
+
+    def _create_landmarker(self, model_path, use_gpu, detection_con, track_con):
+        """
+        Creates a Tasks API PoseLandmarker, preferring the GPU delegate.
+        """
+        BaseOptions = mp.tasks.BaseOptions
+        vision = mp.tasks.vision
+        delegates = [BaseOptions.Delegate.GPU, BaseOptions.Delegate.CPU] if use_gpu else [BaseOptions.Delegate.CPU]
+        
+        for delegate in delegates:
+            options = vision.PoseLandmarkerOptions(
+                base_options=BaseOptions(model_asset_path=model_path, delegate=delegate),
+                running_mode=vision.RunningMode.VIDEO,
+                num_poses=1,
+                min_pose_detection_confidence=detection_con,
+                min_tracking_confidence=track_con
+            )
+            try:
+                return vision.PoseLandmarker.create_from_options(options)
+            except (RuntimeError, NotImplementedError) as e:
+                if delegate == BaseOptions.Delegate.CPU:
+                    raise
+                print(f"GPU delegate unavailable ({e}), falling back to CPU.")
 
     def find_pose(self, img, draw=True):
         """
@@ -30,27 +92,65 @@ class PoseDetector:
             draw (bool): Whether to draw landmarks on the image.
             
         Returns:
-            img: Image with landmarks drawn (if draw=True).
-            results: MediaPipe pose results.
+            img: Image with landmarks drawn (if draw=True), at its original resolution.
+            results: MediaPipe pose results (PoseLandmarkerResult with model_path).
         """
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.pose.process(img_rgb)
+        h, w = img.shape[:2]
+        if self.inference_scale != 1.0:
+            w, h = max(1, int(w * self.inference_scale)), max(1, int(h * self.inference_scale))
+        if self._rgb_buf is None or self._rgb_buf.shape[:2] != (h, w):
+            self._rgb_buf = np.empty((h, w, 3), dtype=np.uint8)
+        self._rgb_buf.flags.writeable = True
+        
+        if self.inference_scale != 1.0:
+            # Resize into the buffer, then swap channels in place
+            cv2.resize(img, (w, h), dst=self._rgb_buf, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self._rgb_buf, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        else:
+            cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        # Read-only input lets MediaPipe use the buffer without copying it
+        self._rgb_buf.flags.writeable = False
         
-        if self.results.pose_landmarks and draw:
+        if self.landmarker:
+            # VIDEO mode requires strictly increasing timestamps
+            timestamp_ms = max(int(time.monotonic() * 1000), self._last_timestamp_ms + 1)
+            self._last_timestamp_ms = timestamp_ms
+            image = mp.Image(image_format=mp.ImageFormat.SRGB, data=self._rgb_buf)
+            self.results = self.landmarker.detect_for_video(image, timestamp_ms)
+            self.pose_landmarks = None
+            if self.results.pose_landmarks:
+                # Same proto the legacy solution returns, for drawing and analysis
+                self.pose_landmarks = landmark_pb2.NormalizedLandmarkList(landmark=[
+                    landmark_pb2.NormalizedLandmark(x=lm.x, y=lm.y, z=lm.z, visibility=lm.visibility)
+                    for lm in self.results.pose_landmarks[0]
+                ])
+        else:
+            self.results = self.pose.process(self._rgb_buf)
+            self.pose_landmarks = self.results.pose_landmarks
+        
+        if draw:
+            self.draw_landmarks(img)
+            
+        return img, self.results
+
+    def draw_landmarks(self, img):
+        """
+        Draws the most recently found landmarks (if any) onto img.
+        """
+        if self.pose_landmarks:
             self.mp_drawing.draw_landmarks(
                 img, 
-                self.results.pose_landmarks, 
+                self.pose_landmarks, 
                 self.mp_pose.POSE_CONNECTIONS,
                 self.mp_drawing.DrawingSpec(color=(245,117,66), thickness=2, circle_radius=2),
                 self.mp_drawing.DrawingSpec(color=(245,66,230), thickness=2, circle_radius=2)
             )
-            
-        return img, self.results
+        return img
 
     def get_landmarks(self):
         """
         Returns the raw landmarks if found.
         """
-        if self.results and self.results.pose_landmarks:
-            return self.results.pose_landmarks.landmark
+        if self.pose_landmarks:
+            return self.pose_landmarks.landmark
         return None
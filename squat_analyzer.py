@@ -1,7 +1,148 @@
+import math
 import time
 import numpy as np
 import mediapipe as mp
-from utils import calculate_angle, get_landmark_pixel
+from utils import calculate_angle_xy, njit
+
+# Landmark indices (MediaPipe Pose), resolved once at import
+_PL = mp.solutions.pose.PoseLandmark
+L_SHOULDER, R_SHOULDER = _PL.LEFT_SHOULDER.value, _PL.RIGHT_SHOULDER.value
+L_HIP, R_HIP = _PL.LEFT_HIP.value, _PL.RIGHT_HIP.value
+L_KNEE, R_KNEE = _PL.LEFT_KNEE.value, _PL.RIGHT_KNEE.value
+L_ANKLE, R_ANKLE = _PL.LEFT_ANKLE.value, _PL.RIGHT_ANKLE.value
+L_HEEL, R_HEEL = _PL.LEFT_HEEL.value, _PL.RIGHT_HEEL.value
+L_TOE, R_TOE = _PL.LEFT_FOOT_INDEX.value, _PL.RIGHT_FOOT_INDEX.value
+
+# Gather order for the per-frame landmark array (rows of `pts` in analyze)
+_KEY_LM = (L_HIP, R_HIP, L_SHOULDER, R_SHOULDER, L_KNEE, R_KNEE,
+           L_ANKLE, R_ANKLE, L_HEEL, R_HEEL, L_TOE, R_TOE)
+# analyze splits visibility by row parity: even rows left side, odd rows right
+assert all(_PL(lm).name.startswith("LEFT_" if i % 2 == 0 else "RIGHT_")
+           for i, lm in enumerate(_KEY_LM)), "_KEY_LM must alternate left/right"
+
+# Row of each landmark in the gathered array
+_ROW_L_HIP, _ROW_R_HIP = _KEY_LM.index(L_HIP), _KEY_LM.index(R_HIP)
+_ROW_L_SHOULDER, _ROW_R_SHOULDER = _KEY_LM.index(L_SHOULDER), _KEY_LM.index(R_SHOULDER)
+_ROW_L_KNEE, _ROW_R_KNEE = _KEY_LM.index(L_KNEE), _KEY_LM.index(R_KNEE)
+_ROW_L_ANKLE, _ROW_R_ANKLE = _KEY_LM.index(L_ANKLE), _KEY_LM.index(R_ANKLE)
+_ROW_L_HEEL, _ROW_R_HEEL = _KEY_LM.index(L_HEEL), _KEY_LM.index(R_HEEL)
+_ROW_L_TOE, _ROW_R_TOE = _KEY_LM.index(L_TOE), _KEY_LM.index(R_TOE)
+
+# Active side codes passed to _compute_metrics (BOTH = front view)
+_SIDE_LEFT, _SIDE_RIGHT, _SIDE_BOTH = 0, 1, 2
+
+@njit(cache=True, fastmath=True)
+def _torso_angle(hip_x, hip_y, shoulder_x, shoulder_y):
+    # Angle between hip->shoulder and straight up (-y in image coords):
+    # with up = (0, -1), cross = dx and dot = -dy, so one atan2 suffices
+    return math.degrees(math.atan2(abs(shoulder_x - hip_x), hip_y - shoulder_y))
+
+@njit(cache=True, fastmath=True)
+def _knee_past_toe(knee_x, ankle_x, toe_x):
+    # Facing Left: Toe X < Ankle X. Knee should not be < Toe X.
+    # Facing Right: Toe X > Ankle X. Knee should not be > Toe X.
+    tolerance = 85.0 # Very lenient tolerance for "Slightly Forward" (85px)
+    if toe_x < ankle_x: # Facing Left
+        return knee_x < toe_x - tolerance # Crossed by more than tolerance
+    return knee_x > toe_x + tolerance # Facing Right
+
+@njit(cache=True, fastmath=True)
+def _compute_metrics(pts, side):
+    """
+    Computes joint angles and per-frame form checks.
+    
+    Args:
+        pts: (12, 2) float32 pixel coordinates in _KEY_LM order (see the
+            _ROW_* constants).
+        side (int): _SIDE_LEFT / _SIDE_RIGHT for side view, _SIDE_BOTH for front view.
+        
+    Returns:
+        tuple: (l_knee_angle, r_knee_angle, current_knee_angle, current_torso_angle,
+                symmetry_diff, valgus_detected, knee_over_toes, heel_lift_detected)
+    """
+    l_hip, r_hip = pts[_ROW_L_HIP], pts[_ROW_R_HIP]
+    l_knee, r_knee = pts[_ROW_L_KNEE], pts[_ROW_R_KNEE]
+    l_ankle, r_ankle = pts[_ROW_L_ANKLE], pts[_ROW_R_ANKLE]
+    l_toe, r_toe = pts[_ROW_L_TOE], pts[_ROW_R_TOE]
+    
+    l_knee_angle = calculate_angle_xy(l_hip[0], l_hip[1], l_knee[0], l_knee[1], l_ankle[0], l_ankle[1])
+    r_knee_angle = calculate_angle_xy(r_hip[0], r_hip[1], r_knee[0], r_knee[1], r_ankle[0], r_ankle[1])
+    
+    # Torso Angle (Vertical reference)
+    l_shoulder, r_shoulder = pts[_ROW_L_SHOULDER], pts[_ROW_R_SHOULDER]
+    l_torso_angle = _torso_angle(l_hip[0], l_hip[1], l_shoulder[0], l_shoulder[1])
+    r_torso_angle = _torso_angle(r_hip[0], r_hip[1], r_shoulder[0], r_shoulder[1])
+    
+    # Foot checks for both sides at once, selected by active side below
+    # Knee Over Toe (Rule 3)
+    l_kot = _knee_past_toe(l_knee[0], l_ankle[0], l_toe[0])
+    r_kot = _knee_past_toe(r_knee[0], r_ankle[0], r_toe[0])
+    
+    # Check Heel Lift (Heel Y should not be significantly higher than Toe Y)
+    # Note: Y increases downwards. Higher (up) means lower Y value.
+    # If Heel Y < Toe Y - threshold, it's lifted.
+    heel_lift_threshold = 75.0 # Very lenient threshold (fixed pixels)
+    l_lifted = pts[_ROW_L_HEEL, 1] < l_toe[1] - heel_lift_threshold
+    r_lifted = pts[_ROW_R_HEEL, 1] < r_toe[1] - heel_lift_threshold
+    
+    symmetry_diff = 0.0
+    valgus_detected = False
+    
+    if side == _SIDE_LEFT:
+        current_knee_angle = l_knee_angle
+        current_torso_angle = l_torso_angle
+        knee_over_toes = l_kot
+        heel_lift_detected = l_lifted
+    elif side == _SIDE_RIGHT:
+        current_knee_angle = r_knee_angle
+        current_torso_angle = r_torso_angle
+        knee_over_toes = r_kot
+        heel_lift_detected = r_lifted
+    else: # FRONT
+        current_knee_angle = (l_knee_angle + r_knee_angle) / 2.0
+        current_torso_angle = (l_torso_angle + r_torso_angle) / 2.0
+        symmetry_diff = abs(l_knee_angle - r_knee_angle)
+        # Knee-over-toes is a side-view check; heel lift is harder to see from
+        # the front, so flag it if either side is lifted
+        knee_over_toes = False
+        heel_lift_detected = l_lifted or r_lifted
+        
+        # Check Valgus (Front logic) - Robust Width Ratio Method
+        knee_width = abs(l_knee[0] - r_knee[0])
+        ankle_width = abs(l_ankle[0] - r_ankle[0])
+        
+        # If knees are significantly narrower than ankles (Valgus)
+        # Threshold: Knees < 63% of ankle width
+        if knee_width < ankle_width * 0.63:
+            valgus_detected = True
+    
+    return (l_knee_angle, r_knee_angle, current_knee_angle, current_torso_angle,
+            symmetry_diff, valgus_detected, knee_over_toes, heel_lift_detected)
+
+# Compile up front so the first analyzed frame doesn't stall on JIT
+_compute_metrics(np.zeros((len(_KEY_LM), 2), dtype=np.float32), _SIDE_BOTH)
+
+# Fault tokens emitted by _score_rep -> rep comment text / coaching advice
+_FAULT_LABELS = {
+    "SHALLOW": "Too shallow",
+    "DEPTH": "Depth could be better",
+    "DIVE_BOMB": "Dive bomb (too fast)",
+    "ASYMMETRY": "Asymmetrical",
+    "LEAN": "Leaning forward",
+    "VALGUS": "Knee valgus (caving in)",
+    "KOT": "Knees crossed toes",
+    "HEEL_LIFT": "Heels lifted",
+}
+_FAULT_ADVICE = {
+    "SHALLOW": "Ass to grass! Don't cheat depth.",
+    "DEPTH": "Get lower. Parallel at least.",
+    "DIVE_BOMB": "Stop dive bombing! Control it.",
+    "ASYMMETRY": "Stop shifting. Push evenly.",
+    "LEAN": "Chest UP! This isn't a Good Morning.",
+    "VALGUS": "Knees OUT! Fight the cave.",
+    "KOT": "Sit back! Save your knees.",
+    "HEEL_LIFT": "Heels GLUED to the floor.",
+}
 
 class SquatAnalyzer:
     def __init__(self):
@@ -11,13 +152,12 @@ class SquatAnalyzer:
         self.correct_reps = 0
         self.incorrect_reps = 0
         self.current_rep_quality = {}
-        self.current_rep_quality = {}
-        self.feedback = ""
         self.feedback = ""
         self.advice = ""
-        self.prev_state = "STANDING"
         self.state_counter = 0 # Debounce counter
-        self.state_transition_threshold = 4 # Frames required to confirm state change
+        self.state_transition_threshold = 2 # Frames required to confirm state change (signal is smoothed)
+        self.knee_smoothing = 0.5 # EMA weight of the newest knee angle (1.0 = no smoothing)
+        self._knee_ema = None
         
         # Thresholds (Configurable)
         self.stand_threshold = 160
@@ -33,11 +173,32 @@ class SquatAnalyzer:
         self.bottom_duration = 0
         self.knee_valgus_flags = 0
         self.back_angle_flags = 0
+        self.knee_over_toes_flags = 0
         self.heel_lift_flags = 0
-        self.frame_count = 0
+        # Smoothed knee angle and time (s since rep start) of each analyzed
+        # frame of the current rep. Fixed size: ~17s at 30 fps, frames past
+        # that are not recorded.
+        self._angle_buf = np.empty(512, dtype=np.float32)
+        self._time_buf = np.empty(512, dtype=np.float64)
+        self._buf_i = 0
         
-        # Landmarks indices (MediaPipe Pose)
-        self.mp_pose = mp.solutions.pose
+        # Result returned by analyze: one dict, updated in place every frame
+        self._out = {
+            "state": self.state,
+            "rep_count": 0,
+            "l_knee_angle": 0,
+            "r_knee_angle": 0,
+            "torso_angle": 0,
+            "feedback": "",
+            "last_rep_score": 0,
+            "last_rep_quality": {},
+            "valgus_detected": False,
+            "view": "UNKNOWN",
+            "knee_over_toes": False,
+            "correct_reps": 0,
+            "incorrect_reps": 0,
+            "advice": ""
+        }
         
     def _reset_rep_stats(self):
         self.min_knee_angle = 180
@@ -49,75 +210,47 @@ class SquatAnalyzer:
         self.knee_valgus_flags = 0
         self.back_angle_flags = 0
         self.knee_over_toes_flags = 0
-        self.frame_count = 0
-        self.knee_over_toes_flags = 0
         self.heel_lift_flags = 0
+        self._buf_i = 0
         self.advice = ""
         self.current_rep_quality = {}
 
-    def analyze(self, landmarks, frame_width, frame_height):
+    def analyze(self, landmarks, frame_width, frame_height, timestamp=None):
         """
         Main analysis loop called every frame.
+        
+        Args:
+            timestamp (float): Frame time in seconds used for rep timing.
+                Defaults to the wall clock; pass the video position when
+                processing a file faster or slower than real time.
         """
         if not landmarks:
-            return {
-                "state": self.state,
-                "rep_count": self.rep_count,
-                "l_knee_angle": 0,
-                "r_knee_angle": 0,
-                "torso_angle": 0,
-                "feedback": "No person detected",
-                "last_rep_score": 0,
-                "last_rep_quality": {},
-                "valgus_detected": False,
-                "view": "UNKNOWN"
-            }
+            self._knee_ema = None
+            out = self._result("No person detected")
+            out["last_rep_score"] = 0
+            out["last_rep_quality"] = {}
+            return out
 
-        # 0. Check Visibility & Detect View
-        # Define side-specific key landmarks
-        left_side_lm = [
-            self.mp_pose.PoseLandmark.LEFT_SHOULDER, self.mp_pose.PoseLandmark.LEFT_HIP,
-            self.mp_pose.PoseLandmark.LEFT_KNEE, self.mp_pose.PoseLandmark.LEFT_ANKLE,
-            self.mp_pose.PoseLandmark.LEFT_HEEL, self.mp_pose.PoseLandmark.LEFT_FOOT_INDEX
-        ]
-        right_side_lm = [
-            self.mp_pose.PoseLandmark.RIGHT_SHOULDER, self.mp_pose.PoseLandmark.RIGHT_HIP,
-            self.mp_pose.PoseLandmark.RIGHT_KNEE, self.mp_pose.PoseLandmark.RIGHT_ANKLE,
-            self.mp_pose.PoseLandmark.RIGHT_HEEL, self.mp_pose.PoseLandmark.RIGHT_FOOT_INDEX
-        ]
+        # Extract Key Landmarks (x, y, visibility) in a single gather
+        key_lm = [landmarks[i] for i in _KEY_LM]
+        arr = np.fromiter((v for lm in key_lm for v in (lm.x, lm.y, lm.visibility)),
+                          dtype=np.float32, count=len(_KEY_LM) * 3).reshape(-1, 3)
 
-        # Check visibility for both sides
-        is_left_visible = all(landmarks[lm.value].visibility > 0.5 for lm in left_side_lm)
-        is_right_visible = all(landmarks[lm.value].visibility > 0.5 for lm in right_side_lm)
+        # 0. Check Visibility & Detect View
+        # _KEY_LM alternates left/right (asserted at import), so even rows are
+        # the left side's key landmarks and odd rows the right's
+        vis = arr[:, 2] > 0.5
+        is_left_visible = bool(vis[0::2].all())
+        is_right_visible = bool(vis[1::2].all())
 
         if not (is_left_visible or is_right_visible):
-             return {
-                "state": self.state,
-                "rep_count": self.rep_count,
-                "l_knee_angle": 0,
-                "r_knee_angle": 0,
-                "torso_angle": 0,
-                "feedback": "Show Full Body!",
-                "last_rep_score": self.current_rep_quality.get("score", 0),
-                "last_rep_quality": self.current_rep_quality,
-                "valgus_detected": False,
-                "view": "UNKNOWN"
-            }
+            self._knee_ema = None
+            return self._result("Show Full Body!")
 
-        # Extract Key Landmarks (Pixels)
-        l_hip_px = get_landmark_pixel(landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value], frame_width, frame_height)
-        r_hip_px = get_landmark_pixel(landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value], frame_width, frame_height)
-        l_shoulder_px = get_landmark_pixel(landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value], frame_width, frame_height)
-        r_shoulder_px = get_landmark_pixel(landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value], frame_width, frame_height)
-        
-        l_knee_px = get_landmark_pixel(landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value], frame_width, frame_height)
-        r_knee_px = get_landmark_pixel(landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value], frame_width, frame_height)
-        l_ankle_px = get_landmark_pixel(landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value], frame_width, frame_height)
-        r_ankle_px = get_landmark_pixel(landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value], frame_width, frame_height)
-        
-        # New Landmarks for Side Check
-        l_toe_px = get_landmark_pixel(landmarks[self.mp_pose.PoseLandmark.LEFT_FOOT_INDEX.value], frame_width, frame_height)
-        r_toe_px = get_landmark_pixel(landmarks[self.mp_pose.PoseLandmark.RIGHT_FOOT_INDEX.value], frame_width, frame_height)
+        # Key Landmarks (Pixels)
+        pts = arr[:, :2] * np.array([frame_width, frame_height], dtype=np.float32)
+        l_hip_px, r_hip_px = pts[_ROW_L_HIP].tolist(), pts[_ROW_R_HIP].tolist()
+        l_shoulder_px, r_shoulder_px = pts[_ROW_L_SHOULDER].tolist(), pts[_ROW_R_SHOULDER].tolist()
 
         # 1. Determine View (Front vs Side)
         # Heuristic: Compare shoulder width to torso height
@@ -125,7 +258,7 @@ class SquatAnalyzer:
         torso_height = abs((l_shoulder_px[1] + r_shoulder_px[1])/2 - (l_hip_px[1] + r_hip_px[1])/2)
         
         view = "FRONT"
-        active_side = "BOTH"
+        active_side = _SIDE_BOTH
         
         # If width is small relative to height, assume Side View
         # Threshold 0.25 is heuristic
@@ -133,103 +266,46 @@ class SquatAnalyzer:
             view = "SIDE"
             # Determine Active Side (closest to camera). 
             # Use Z-coordinate (negative is closer in MediaPipe).
-            l_z = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value].z
-            r_z = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value].z
+            l_z = landmarks[L_SHOULDER].z
+            r_z = landmarks[R_SHOULDER].z
             
             if l_z < r_z: 
-                active_side = "LEFT"
+                active_side = _SIDE_LEFT
             else:
-                active_side = "RIGHT"
+                active_side = _SIDE_RIGHT
                 
             # Fallback to visibility if Z is unreliable or close
             if not is_right_visible and is_left_visible:
-                active_side = "LEFT"
+                active_side = _SIDE_LEFT
             elif not is_left_visible and is_right_visible:
-                active_side = "RIGHT"
+                active_side = _SIDE_RIGHT
         
         # 2. Calculate Angles & Metrics based on View
-        l_knee_angle = calculate_angle(l_hip_px, l_knee_px, l_ankle_px)
-        r_knee_angle = calculate_angle(r_hip_px, r_knee_px, r_ankle_px)
-        
-        # Torso Angle (Vertical reference)
-        l_torso_angle = calculate_angle((l_hip_px[0], l_hip_px[1]-100), l_hip_px, l_shoulder_px)
-        r_torso_angle = calculate_angle((r_hip_px[0], r_hip_px[1]-100), r_hip_px, r_shoulder_px)
-        
-        current_knee_angle = 0
-        current_torso_angle = 0
-        symmetry_diff = 0
-        knee_over_toes = False
-        valgus_detected = False
+        (l_knee_angle, r_knee_angle, current_knee_angle, current_torso_angle,
+         symmetry_diff, valgus_detected, knee_over_toes,
+         heel_lift_detected) = _compute_metrics(pts, active_side)
 
-        if view == "FRONT":
-            # Require reasonably balanced visibility
-            if not (is_left_visible and is_right_visible):
-                 # If we thought it was FRONT but one side is missing, maybe force SIDE or warn?
-                 # We'll allow it but rely on avg.
-                 pass
-                 
-            current_knee_angle = (l_knee_angle + r_knee_angle) / 2.0
-            current_torso_angle = (l_torso_angle + r_torso_angle) / 2.0
-            symmetry_diff = abs(l_knee_angle - r_knee_angle)
-            
-            # Check Valgus (Front logic) - Robust Width Ratio Method
-            knee_width = abs(l_knee_px[0] - r_knee_px[0])
-            ankle_width = abs(l_ankle_px[0] - r_ankle_px[0])
-            
-            # If knees are significantly narrower than ankles (Valgus)
-            # If knees are significantly narrower than ankles (Valgus)
-            # Threshold: Knees < 63% of ankle width
-            if knee_width < ankle_width * 0.63:
-                valgus_detected = True
-                
-        else: # SIDE
-            if active_side == "LEFT":
-                current_knee_angle = l_knee_angle
-                current_torso_angle = l_torso_angle
-                # Knee Over Toe Check (Left Side)
-                # Facing Left: Toe X < Ankle X. Knee should not be < Toe X.
-                # Facing Right: Toe X > Ankle X. Knee should not be > Toe X.
-                
-                # Check Face Direction using Toes relative to Ankle
-                toe_x = l_toe_px[0]
-                ankle_x = l_ankle_px[0]
-                knee_x = l_knee_px[0]
-                
-                # Tolerance for "Slightly Forward" (Rule 3)
-                # Tolerance for "Slightly Forward" (Rule 3)
-                # Tolerance for "Slightly Forward" (Rule 3)
-                tolerance = 85 # Very lenient tolerance (85px)
-                
-                if toe_x < ankle_x: # Facing Left
-                    if knee_x < toe_x - tolerance: # Crossed by more than tolerance
-                        knee_over_toes = True
-                else: # Facing Right
-                    if knee_x > toe_x + tolerance:
-                        knee_over_toes = True
-
-            else: # RIGHT
-                current_knee_angle = r_knee_angle
-                current_torso_angle = r_torso_angle
-                
-                toe_x = r_toe_px[0]
-                ankle_x = r_ankle_px[0]
-                knee_x = r_knee_px[0]
-                
-                # Tolerance for "Slightly Forward" (Rule 3)
-                # Tolerance for "Slightly Forward" (Rule 3)
-                # Tolerance for "Slightly Forward" (Rule 3)
-                tolerance = 85 # Very lenient tolerance (85px)
-                
-                if toe_x < ankle_x: # Facing Left
-                    if knee_x < toe_x - tolerance: # Crossed by more than tolerance
-                        knee_over_toes = True
-                else: # Facing Right
-                    if knee_x > toe_x + tolerance:
-                        knee_over_toes = True
+        # Low-pass the knee angle so landmark jitter doesn't bounce it across
+        # the thresholds and keep resetting the debounce counter
+        if self._knee_ema is None:
+            self._knee_ema = current_knee_angle
+        else:
+            self._knee_ema = (self.knee_smoothing * current_knee_angle
+                              + (1 - self.knee_smoothing) * self._knee_ema)
+        current_knee_angle = self._knee_ema
 
+        current_time = time.time() if timestamp is None else timestamp
+        
         # 3. Update State Metrics
         self.min_knee_angle = min(self.min_knee_angle, current_knee_angle)
         
+        # Record the angle series while a rep is in progress; tempo stats are
+        # computed from it once the rep completes (see _score_rep)
+        if self.state != "STANDING" and self._buf_i < len(self._angle_buf):
+            self._angle_buf[self._buf_i] = current_knee_angle
+            self._time_buf[self._buf_i] = current_time - self.rep_start_time
+            self._buf_i += 1
+        
         if valgus_detected:
             self.knee_valgus_flags += 1
         
@@ -240,40 +316,10 @@ class SquatAnalyzer:
         if knee_over_toes:
             self.knee_over_toes_flags += 1
 
-        # Check Heel Lift (Heel Y should not be significantly higher than Toe Y)
-        # Note: Y increases downwards. Higher (up) means lower Y value.
-        # If Heel Y < Toe Y - threshold, it's lifted.
-        heel_lift_detected = False
-        # Normalize threshold? 0.02 is rough guess for normalized, but we have pixels here.
-        # Let's use relative to ankle-toe distance or just fixed pixel threshold scaled by height?
-        # Fixed pixel: 
-        heel_lift_threshold = 75 # Very lenient threshold
-        
-        l_toe_py = l_toe_px[1]
-        l_heel_py = get_landmark_pixel(landmarks[self.mp_pose.PoseLandmark.LEFT_HEEL.value], frame_width, frame_height)[1]
-        
-        r_toe_py = r_toe_px[1]
-        r_heel_py = get_landmark_pixel(landmarks[self.mp_pose.PoseLandmark.RIGHT_HEEL.value], frame_width, frame_height)[1]
-        
-        if view == "SIDE":
-            if active_side == "LEFT":
-                 if l_heel_py < l_toe_py - heel_lift_threshold:
-                     heel_lift_detected = True
-            else:
-                 if r_heel_py < r_toe_py - heel_lift_threshold:
-                     heel_lift_detected = True
-        else: # FRONT
-            # Check both? usually harder to see heel lift in front view but we can try.
-            # If either is lifted:
-            if (l_heel_py < l_toe_py - heel_lift_threshold) or (r_heel_py < r_toe_py - heel_lift_threshold):
-                heel_lift_detected = True
-        
         if heel_lift_detected:
             self.heel_lift_flags += 1
             
         # 4. State Machine (Shared Logic)
-        current_time = time.time()
-        
         # Override feedback for Critical Errors immediately
         feed_override = None
         if knee_over_toes:
@@ -345,77 +391,96 @@ class SquatAnalyzer:
         if feed_override and self.state in ["DESCENDING", "BOTTOM"]:
              self.feedback = feed_override
 
-        return {
-            "state": self.state,
-            "rep_count": self.rep_count,
-            "l_knee_angle": l_knee_angle,
-            "r_knee_angle": r_knee_angle,
-            "torso_angle": current_torso_angle,
-            "feedback": self.feedback,
-            "last_rep_score": self.current_rep_quality.get("score", 0),
-            "last_rep_quality": self.current_rep_quality,
-            "valgus_detected": valgus_detected,
-            "view": view,
-            "view": view,
-            "knee_over_toes": knee_over_toes,
-            "knee_over_toes": knee_over_toes,
-            "correct_reps": self.correct_reps,
-            "incorrect_reps": self.incorrect_reps,
-            "advice": self.advice
-        }
+        return self._result(self.feedback, view, l_knee_angle, r_knee_angle, current_torso_angle,
+                            valgus_detected, knee_over_toes)
+
+    def _result(self, feedback, view="UNKNOWN", l_knee_angle=0, r_knee_angle=0, torso_angle=0,
+                valgus_detected=False, knee_over_toes=False):
+        """
+        Updates and returns the shared result dict. Callers must not hold on
+        to it across frames (copy it if needed).
+        """
+        out = self._out
+        out["state"] = self.state
+        out["rep_count"] = self.rep_count
+        out["l_knee_angle"] = l_knee_angle
+        out["r_knee_angle"] = r_knee_angle
+        out["torso_angle"] = torso_angle
+        out["feedback"] = feedback
+        out["last_rep_score"] = self.current_rep_quality.get("score", 0)
+        out["last_rep_quality"] = self.current_rep_quality
+        out["valgus_detected"] = valgus_detected
+        out["view"] = view
+        out["knee_over_toes"] = knee_over_toes
+        out["correct_reps"] = self.correct_reps
+        out["incorrect_reps"] = self.incorrect_reps
+        out["advice"] = self.advice
+        return out
 
     def _score_rep(self, symmetry_diff):
         """
         Calculates a score (0-100) for the completed rep.
         """
+        # Angle-series stats for the rep, in one pass over the buffer
+        rep = self._angle_buf[:self._buf_i]
+        rep_t = self._time_buf[:self._buf_i]
+        descent_slope = 0.0
+        if len(rep):
+            bottom = int(rep.argmin())
+            if bottom > 0 and rep_t[bottom] > rep_t[0]:
+                # Degrees per second (negative while going down)
+                descent_slope = float(np.polyfit(rep_t[:bottom + 1], rep[:bottom + 1], 1)[0])
+        
         score = 100
         deductions = []
         
         # 1. Depth
         if self.min_knee_angle > 115:
             score -= 20
-            deductions.append("Too shallow")
+            deductions.append("SHALLOW")
         elif self.min_knee_angle > 105:
             score -= 10
-            deductions.append("Depth could be better")
+            deductions.append("DEPTH")
             
         # 2. Tempo
         if self.descent_duration < 1.0:
             score -= 10
-            deductions.append("Dive bomb (too fast)")
+            deductions.append("DIVE_BOMB")
         
         # 3. Symmetry
         # Only check symmetry if it's significant (arbitrary check to safely ignore side view "0" or huge diff)
         # Ideally we'd know if it was a FRONT rep, but for now we rely on the passed diff.
         if symmetry_diff > 10:
             score -= 10
-            deductions.append("Asymmetrical")
+            deductions.append("ASYMMETRY")
             
         # 4. Back Angle
         if self.back_angle_flags > 5: # If detected in multiple frames
             score -= 10
-            deductions.append("Leaning forward")
+            deductions.append("LEAN")
             
         # 5. Knee Valgus
         if self.knee_valgus_flags > 5:
             score -= 15
-            deductions.append("Knee valgus (caving in)")
+            deductions.append("VALGUS")
             
         # 6. Knee Over Toes
         if self.knee_over_toes_flags > 5:
             score -= 15
-            deductions.append("Knees crossed toes")
+            deductions.append("KOT")
             
         # 7. Heel Lift
         if self.heel_lift_flags > 5:
             score -= 15
-            deductions.append("Heels lifted")
+            deductions.append("HEEL_LIFT")
             
         self.current_rep_quality = {
             "score": max(0, score),
             "depth": self.min_knee_angle,
             "descent_time": self.descent_duration,
-            "comments": ", ".join(deductions) if deductions else "Good Rep!"
+            "descent_slope": descent_slope,
+            "angle_std": float(rep.std()) if len(rep) else 0.0,
+            "comments": ", ".join(_FAULT_LABELS[f] for f in deductions) if deductions else "Good Rep!"
         }
         
         # Determine Correct/Incorrect based on CRITICAL FAULTS
@@ -423,23 +488,23 @@ class SquatAnalyzer:
         
         # 1. Depth (Rule 5)
         if self.min_knee_angle > 115: 
-            critical_faults.append("Shallow")
+            critical_faults.append("SHALLOW")
             
         # 2. Valgus (Rule 3 - Knee collapse)
         if self.knee_valgus_flags > 30: # Increased from 15
-            critical_faults.append("Valgus")
+            critical_faults.append("VALGUS")
             
         # 3. Knee Over Toes (Rule 3 - Excessive)
         if self.knee_over_toes_flags > 45: # Increased from 15
-            critical_faults.append("Knee Over Toes")
+            critical_faults.append("KOT")
             
         # 4. Heel Lift (Rule 6)
         if self.heel_lift_flags > 30: # Increased from 15
-            critical_faults.append("Heel Lift")
+            critical_faults.append("HEEL_LIFT")
             
         # 5. Back Angle (Rule 2)
         if self.back_angle_flags > 45: # Increased from 20
-            critical_faults.append("Back Lean")
+            critical_faults.append("LEAN")
 
         # Result
         if not critical_faults:
@@ -447,14 +512,14 @@ class SquatAnalyzer:
         else:
              self.incorrect_reps += 1
              
-        # Generate Advice
+        # Generate Advice (critical faults first, each list in priority order)
         self.advice = self._get_feedback_advice(critical_faults + deductions)
              
         self.feedback = f"Rep {self.rep_count}: {self.current_rep_quality['comments']}"
         
     def _get_feedback_advice(self, faults):
         """
-        Returns actionable advice based on detected faults.
+        Returns actionable advice for the first (highest-priority) fault token.
         """
         if not faults:
             import random
@@ -468,27 +533,4 @@ class SquatAnalyzer:
             ]
             return random.choice(pro_tips)
             
-        advice_map = {
-            "Shallow": "Ass to grass! Don't cheat depth.",
-            "Too shallow": "Ass to grass! Don't cheat depth.",
-            "Depth could be better": "Get lower. Parallel at least.",
-            "Valgus": "Knees OUT! Fight the cave.",
-            "Knee valgus": "Knees OUT! Fight the cave.",
-            "Knee Valgus (caving in)": "Knees OUT! Fight the cave.",
-            "Knee Over Toes": "Sit back! Save your knees.",
-            "Knees crossed toes": "Sit back! Save your knees.",
-            "Heel Lift": "Heels GLUED to the floor.",
-            "Heels lifted": "Heels GLUED to the floor.",
-            "Back Lean": "Chest UP! This isn't a Good Morning.",
-            "Leaning forward": "Chest UP! This isn't a Good Morning.",
-            "Dive bomb (too fast)": "Stop dive bombing! Control it.",
-            "Asymmetrical": "Stop shifting. Push evenly."
-        }
-        
-        # Prioritize advice
-        for fault in faults:
-            for key in advice_map:
-                if key in fault: 
-                    return advice_map[key]
-                    
-        return "Improve form."
+        return _FAULT_ADVICE.get(faults[0], "Improve form.")
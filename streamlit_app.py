@@ -3,10 +3,56 @@ import cv2
 import tempfile
 import os
 import time
+import queue
+import threading
 from pose_detector import PoseDetector
-from squat_analyzer import SquatAnalyzer
-from utils import draw_text_with_background, get_landmark_pixel
-import mediapipe as mp
+from squat_analyzer import SquatAnalyzer, L_KNEE, R_KNEE
+from dashboard import DashboardRenderer
+from utils import get_landmark_pixel
+
+# Temporal subsampling: squat reps span 1-3s, so pose + analysis on every
+# other frame loses nothing; skipped frames reuse the last result for drawing
+POSE_EVERY_N_FRAMES = 2
+
+def put_until_stopped(q, item, stop_event):
+    """
+    Blocking put that gives up once stop_event is set.
+    """
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            pass
+
+def read_frames(cap, frame_q, stop_event):
+    """
+    Producer: decodes frames ahead of processing, then puts None at end of video.
+    """
+    try:
+        while cap.isOpened() and not stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            put_until_stopped(frame_q, frame, stop_event)
+    finally:
+        put_until_stopped(frame_q, None, stop_event)
+
+def write_frames(out, write_q, stop_event, errors):
+    """
+    Consumer: encodes annotated frames until it receives None. On failure it
+    records the exception in `errors` and sets stop_event so the producers
+    stop instead of blocking on a full queue.
+    """
+    try:
+        while True:
+            frame = write_q.get()
+            if frame is None:
+                break
+            out.write(frame)
+    except Exception as e:
+        errors.append(e)
+        stop_event.set()
 
 def process_video(input_path, output_path):
     cap = cv2.VideoCapture(input_path)
@@ -22,85 +68,91 @@ def process_video(input_path, output_path):
         
     out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
     
-    detector = PoseDetector()
+    # Pose inference on a half-size copy; landmarks are normalized, so
+    # analysis and drawing still use the full-resolution frame
+    detector = PoseDetector(inference_scale=0.5)
     analyzer = SquatAnalyzer()
+    # The state machine only steps on analyzed frames, so confirm transitions
+    # in proportionally fewer of them
+    analyzer.state_transition_threshold = max(1, analyzer.state_transition_threshold // POSE_EVERY_N_FRAMES)
+    dashboard = DashboardRenderer()
     
     frame_count = 0
+    video_fps = fps or 30
+    landmarks = None
+    analysis_data = {}
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     
     progress_bar = st.progress(0)
     status_text = st.empty()
     
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+    # Pipeline: decode (reader thread) -> pose + analysis (here) -> encode
+    # (writer thread). Queues block rather than drop: every frame is written.
+    frame_q = queue.Queue(maxsize=8)
+    write_q = queue.Queue(maxsize=8)
+    stop_event = threading.Event()
+    write_errors = []
+    reader = threading.Thread(target=read_frames, args=(cap, frame_q, stop_event), daemon=True)
+    writer = threading.Thread(target=write_frames, args=(out, write_q, stop_event, write_errors), daemon=True)
+    reader.start()
+    writer.start()
+    
+    try:
+        while not stop_event.is_set():
+            try:
+                frame = frame_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if frame is None:
+                break
             
-        # Pose Detection
-        frame, results = detector.find_pose(frame, draw=True)
-        landmarks = detector.get_landmarks()
-        
-        # Analysis
-        analysis_data = {}
-        if landmarks:
-             analysis_data = analyzer.analyze(landmarks, width, height)
+            if frame_count % POSE_EVERY_N_FRAMES == 0:
+                # Pose Detection
+                frame, results = detector.find_pose(frame, draw=True)
+                landmarks = detector.get_landmarks()
+            
+                # Analysis (timed by video position, not processing speed)
+                analysis_data = {}
+                if landmarks:
+                     analysis_data = analyzer.analyze(landmarks, width, height,
+                                                      timestamp=frame_count / video_fps)
+            else:
+                # Skipped frame: overlay the last detection and analysis
+                detector.draw_landmarks(frame)
              
-             # Draw Angles
-             if analysis_data.get('l_knee_angle', 0) > 0:
-                l_knee = landmarks[mp.solutions.pose.PoseLandmark.LEFT_KNEE.value]
+            # Draw Angles
+            if landmarks and analysis_data.get('l_knee_angle', 0) > 0:
+                l_knee = landmarks[L_KNEE]
                 lk_pos = get_landmark_pixel(l_knee, width, height)
                 cv2.putText(frame, f"{int(analysis_data['l_knee_angle'])}", lk_pos, 
                             cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
-                
-                r_knee = landmarks[mp.solutions.pose.PoseLandmark.RIGHT_KNEE.value]
+            
+                r_knee = landmarks[R_KNEE]
                 rk_pos = get_landmark_pixel(r_knee, width, height)
                 cv2.putText(frame, f"{int(analysis_data['r_knee_angle'])}", rk_pos, 
                             cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
 
-        # Overlay Info (Same as app.py but adapted)
-        # Dashboard Background
-        cv2.rectangle(frame, (0, 0), (400, 350), (0, 0, 0), cv2.FILLED)
-        cv2.addWeighted(frame[0:350, 0:400], 0.7, frame[0:350, 0:400], 0.3, 0, frame[0:350, 0:400])
-        
-        if analysis_data:
-            state_color = (0, 255, 255)
-            if analysis_data['state'] == "BOTTOM": state_color = (0, 255, 0)
-            draw_text_with_background(frame, f"State: {analysis_data['state']}", (10, 70), text_color=state_color)
-            
-            draw_text_with_background(frame, f"Reps: {analysis_data['rep_count']}", (10, 110), font_scale=1, thickness=2)
-            
-            c_reps = analysis_data.get('correct_reps', 0)
-            i_reps = analysis_data.get('incorrect_reps', 0)
-            cv2.putText(frame, f"Correct: {c_reps}", (10, 140), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-            cv2.putText(frame, f"Incorrect: {i_reps}", (150, 140), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-            
-            feedback = analysis_data.get('feedback', '')
-            draw_text_with_background(frame, feedback, (10, 180), text_color=(0, 100, 255))
-            
-            advice = analysis_data.get('advice', '')
-            if advice:
-                draw_text_with_background(frame, f"Advice: {advice}", (10, 220), text_color=(255, 255, 0), bg_color=(0,0,0))
-
-            if analysis_data.get('valgus_detected', False):
-                draw_text_with_background(frame, "KNEE VALGUS!", (10, 280), text_color=(0, 0, 255), bg_color=(255, 255, 255))
-            
-            view_mode = analysis_data.get('view', 'Unknown')
-            draw_text_with_background(frame, f"View: {view_mode}", (10, 320), text_color=(200, 200, 200))
-            
-            score = analysis_data.get('last_rep_score', 0)
-            draw_text_with_background(frame, f"Last Score: {score}", (10, 250), 
-                                      text_color=(0, 255, 0) if score > 80 else (0, 0, 255))
+            # Overlay Info (Same dashboard as app.py, without FPS)
+            dashboard.render(frame, analysis_data)
 
-        out.write(frame)
+            put_until_stopped(write_q, frame, stop_event)
         
-        frame_count += 1
-        if total_frames > 0:
-            progress = frame_count / total_frames
-            progress_bar.progress(progress)
-            status_text.text(f"Processing frame {frame_count}/{total_frames}")
+            frame_count += 1
+            if total_frames > 0:
+                progress = frame_count / total_frames
+                progress_bar.progress(progress)
+                status_text.text(f"Processing frame {frame_count}/{total_frames}")
+    finally:
+        # Let the writer drain and exit (gives up if it has already failed)
+        put_until_stopped(write_q, None, stop_event)
+        stop_event.set()
+        writer.join()
+        reader.join()
 
     cap.release()
     out.release()
+    if write_errors:
+        raise write_errors[0]
     progress_bar.empty()
     status_text.text("Processing complete!")
 
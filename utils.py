@@ -1,6 +1,33 @@
-import numpy as np
+import functools
+import math
 import cv2
 
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional: without it, @njit helpers run as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+@njit(cache=True, fastmath=True)
+def calculate_angle_xy(ax, ay, bx, by, cx, cy):
+    """
+    Scalar form of calculate_angle taking the six coordinates directly.
+    Compiled with Numba when available, so it can also be called from other
+    @njit code.
+    """
+    # Vectors from the vertex; atan2(cross, dot) gives the angle between them
+    # directly in [0, 180] without acos clipping or a wrap-around branch
+    ux, uy = ax - bx, ay - by
+    vx, vy = cx - bx, cy - by
+    
+    return abs(math.degrees(math.atan2(ux * vy - uy * vx, ux * vx + uy * vy)))
+
+# Compile up front so the first call doesn't stall on JIT
+calculate_angle_xy(1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+
 def calculate_angle(a, b, c):
     """
     Calculates the angle between three points a, b, and c.
@@ -14,17 +41,8 @@ def calculate_angle(a, b, c):
     Returns:
         float: Angle in degrees.
     """
-    a = np.array(a) # First
-    b = np.array(b) # Mid
-    c = np.array(c) # End
-    
-    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    
-    if angle > 180.0:
-        angle = 360 - angle
-        
-    return angle
+    return calculate_angle_xy(float(a[0]), float(a[1]), float(b[0]), float(b[1]),
+                              float(c[0]), float(c[1]))
 
 def get_landmark_pixel(landmark, frame_width, frame_height):
     """
@@ -40,13 +58,23 @@ def get_landmark_pixel(landmark, frame_width, frame_height):
     """
     return int(landmark.x * frame_width), int(landmark.y * frame_height)
 
+@functools.lru_cache(maxsize=256)
+def get_text_size(text, font, font_scale, thickness):
+    """
+    Cached cv2.getTextSize: dashboard strings recur frame after frame.
+    
+    Returns:
+        tuple: ((width, height), baseline) as returned by cv2.getTextSize.
+    """
+    return cv2.getTextSize(text, font, font_scale, thickness)
+
 def draw_text_with_background(img, text, position, font=cv2.FONT_HERSHEY_SIMPLEX, 
                             font_scale=0.6, text_color=(255, 255, 255), 
                             bg_color=(0, 0, 0), thickness=1, padding=5):
     """
     Draws text with a background rectangle for better visibility.
     """
-    (text_width, text_height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
+    (text_width, text_height), baseline = get_text_size(text, font, font_scale, thickness)
     x, y = position
     
     cv2.rectangle(img, 